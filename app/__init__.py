@@ -2,16 +2,20 @@ from flask import Flask
 from flask_cors import CORS
 from app.database import db, init_db
 from app.config import Config
+from app.auth import init_auth
+from app.json_provider import OrjsonProvider
 
 
 def create_app(config_class=Config):
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = OrjsonProvider(app)
 
     # Initialize extensions
     CORS(app)
     init_db(app)
+    init_auth(app)
 
     # Register blueprints
     from app.routes import api_bp
@@ -1,23 +1,65 @@
+import hmac
 import jwt
-from datetime import datetime, timedelta
+import time
 from functools import wraps
+from threading import Lock
+from cachetools import TTLCache
 from flask import request, jsonify, current_app
-from app.models import User
+from sqlalchemy import insert, or_
+from app.models import User, hash_password, verify_password
 from app.database import db
 
+# Decode settings are built once rather than on every request
+_JWT_ALGORITHM = 'HS256'
+_JWT_ALGORITHMS = [_JWT_ALGORITHM]
+_JWT_OPTIONS = {'require': ['exp', 'user_id'], 'verify_signature': True}
+
+# Checked against when a username doesn't exist, so unknown users cost the same as wrong passwords
+_DUMMY_PASSWORD_HASH = hash_password('dummy-password')
+
+
+def constant_time_compare(a, b):
+    """Compare two secrets in constant time
+
+    Use this instead of == for any token, API key or CSRF value comparison.
+    """
+    if isinstance(a, str):
+        a = a.encode('utf-8')
+    if isinstance(b, str):
+        b = b.encode('utf-8')
+    return hmac.compare_digest(a, b)
+
+
+def init_auth(app):
+    """Initialize per-app authentication state"""
+    app.extensions['jwt'] = {
+        # Pre-encoded so PyJWT doesn't re-encode the secret on every sign/verify
+        'key': app.config['JWT_SECRET_KEY'].encode('utf-8'),
+        'expires': int(app.config['JWT_ACCESS_TOKEN_EXPIRES']),
+        # Verified payloads keyed by raw token, so repeat requests skip HMAC verification
+        'token_cache': TTLCache(
+            maxsize=app.config['JWT_DECODE_CACHE_SIZE'],
+            ttl=app.config['JWT_DECODE_CACHE_TTL']
+        ),
+        'token_cache_lock': Lock()
+    }
+
 
 def generate_token(user_id):
     """Generate JWT access token for user"""
     try:
+        state = current_app.extensions['jwt']
+        # Integer NumericDates avoid building datetime/timedelta objects per token
+        now = int(time.time())
         payload = {
             'user_id': user_id,
-            'exp': datetime.utcnow() + timedelta(seconds=current_app.config['JWT_ACCESS_TOKEN_EXPIRES']),
-            'iat': datetime.utcnow()
+            'exp': now + state['expires'],
+            'iat': now
         }
         token = jwt.encode(
             payload,
-            current_app.config['JWT_SECRET_KEY'],
-            algorithm='HS256'
+            state['key'],
+            algorithm=_JWT_ALGORITHM
         )
         return token
     except Exception as e:
@@ -25,13 +67,30 @@ def generate_token(user_id):
 
 
 def decode_token(token):
-    """Decode and verify JWT token"""
+    """Decode and verify JWT token, reusing recently verified payloads"""
+    state = current_app.extensions['jwt']
+    cache = state['token_cache']
+
+    with state['token_cache_lock']:
+        payload = cache.get(token)
+
+    if payload is not None:
+        # Cache TTL is independent of the token lifetime, so re-check expiry
+        if payload['exp'] > time.time():
+            return payload
+        with state['token_cache_lock']:
+            cache.pop(token, None)
+        return None
+
     try:
         payload = jwt.decode(
             token,
-            current_app.config['JWT_SECRET_KEY'],
-            algorithms=['HS256']
+            state['key'],
+            algorithms=_JWT_ALGORITHMS,
+            options=_JWT_OPTIONS
         )
+        with state['token_cache_lock']:
+            cache[token] = payload
         return payload
     except jwt.ExpiredSignatureError:
         return None
@@ -43,19 +102,15 @@ def token_required(f):
     """Decorator to protect routes with JWT authentication"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-
-        # Get token from Authorization header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(' ')[1]  # Bearer <token>
-            except IndexError:
-                return jsonify({'error': 'Invalid token format'}), 401
-
-        if not token:
+        # Get token from Authorization header: Bearer <token>
+        auth_header = request.headers.get('Authorization')
+        if not auth_header:
             return jsonify({'error': 'Authentication token is missing'}), 401
 
+        scheme, _, token = auth_header.partition(' ')
+        if scheme.lower() != 'bearer' or not token:
+            return jsonify({'error': 'Invalid token format'}), 401
+
         # Decode and verify token
         payload = decode_token(token)
         if not payload:
@@ -76,26 +131,49 @@ def validate_user_credentials(username, password):
     """Validate user credentials and return user if valid"""
     user = User.query.filter_by(username=username).first()
 
-    if not user or not user.check_password(password):
+    if not user:
+        # Burn the same hashing cost so response time doesn't reveal valid usernames
+        verify_password(_DUMMY_PASSWORD_HASH, password)
         return None
 
+    if not user.check_password(password):
+        return None
+
+    # Persist a hash upgraded by check_password
+    if db.session.is_modified(user):
+        db.session.commit()
+
     return user
 
 
 def register_user(username, email, password):
     """Register a new user"""
-    # Check if user already exists
-    if User.query.filter_by(username=username).first():
+    # Check if user already exists, probing both unique fields in one query
+    conflicts = (
+        db.session.query(User.username, User.email)
+        .filter(or_(User.username == username, User.email == email))
+        .all()
+    )
+
+    if any(row.username == username for row in conflicts):
         return None, 'Username already exists'
 
-    if User.query.filter_by(email=email).first():
+    if conflicts:
         return None, 'Email already exists'
 
     # Create new user
     try:
-        user = User(username=username, email=email)
-        user.set_password(password)
-        db.session.add(user)
+        # INSERT ... RETURNING loads the new row in the same round-trip
+        user = db.session.execute(
+            insert(User).values(
+                username=username,
+                email=email,
+                password_hash=hash_password(password)
+            ).returning(User)
+        ).scalar_one()
+
+        # Detach so commit doesn't expire the returned attributes and force a reload
+        db.session.expunge(user)
         db.session.commit()
         return user, None
     except Exception as e:
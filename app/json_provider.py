@@ -0,0 +1,32 @@
+import decimal
+import orjson
+from flask.json.provider import JSONProvider
+
+
+def _default(obj):
+    """Serialize types orjson doesn't handle natively"""
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+def dumps(obj):
+    """Serialize obj to JSON bytes"""
+    return orjson.dumps(obj, default=_default)
+
+
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, which serializes datetimes natively"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Hand orjson's bytes straight to the response without a str round-trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype='application/json')
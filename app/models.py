@@ -1,6 +1,24 @@
 from datetime import datetime
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from app.database import db
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import check_password_hash
+
+# Argon2id with explicit cost so hashing time stays predictable across deployments
+_password_hasher = PasswordHasher(time_cost=3, memory_cost=65536, parallelism=2)
+
+
+def hash_password(password):
+    """Hash a password with Argon2id"""
+    return _password_hasher.hash(password)
+
+
+def verify_password(password_hash, password):
+    """Verify a password against an Argon2 hash"""
+    try:
+        return _password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
 
 
 class User(db.Model):
@@ -15,15 +33,26 @@ class User(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     # Relationships
-    tasks = db.relationship('Task', back_populates='user', cascade='all, delete-orphan', lazy='dynamic')
+    tasks = db.relationship('Task', back_populates='user', cascade='all, delete-orphan')
 
     def set_password(self, password):
         """Hash and set user password"""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        """Verify password against hash"""
-        return check_password_hash(self.password_hash, password)
+        """Verify password against hash, upgrading outdated hashes in place"""
+        if self.password_hash.startswith('$argon2'):
+            if not verify_password(self.password_hash, password):
+                return False
+            if _password_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+            return True
+
+        # Legacy werkzeug pbkdf2 hash from before the Argon2 switch
+        if not check_password_hash(self.password_hash, password):
+            return False
+        self.set_password(password)
+        return True
 
     def to_dict(self):
         """Serialize user object to dictionary"""
@@ -31,8 +60,8 @@ class User(db.Model):
             'id': self.id,
             'username': self.username,
             'email': self.email,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat()
+            'created_at': self.created_at,
+            'updated_at': self.updated_at
         }
 
     def __repr__(self):
@@ -50,17 +79,24 @@ class Category(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
 
     # Relationships
-    tasks = db.relationship('Task', back_populates='category', lazy='dynamic')
+    tasks = db.relationship('Task', back_populates='category')
+
+    def to_dict(self, task_count=None):
+        """Serialize category object to dictionary
+
+        Callers serializing many categories should pass a precomputed
+        task_count to avoid a COUNT query per category.
+        """
+        if task_count is None:
+            task_count = db.session.query(db.func.count(Task.id)).filter(Task.category_id == self.id).scalar()
 
-    def to_dict(self):
-        """Serialize category object to dictionary"""
         return {
             'id': self.id,
             'name': self.name,
             'description': self.description,
             'color': self.color,
-            'created_at': self.created_at.isoformat(),
-            'task_count': self.tasks.count()
+            'created_at': self.created_at,
+            'task_count': task_count
         }
 
     def __repr__(self):
@@ -89,20 +125,23 @@ class Task(db.Model):
     user = db.relationship('User', back_populates='tasks')
     category = db.relationship('Category', back_populates='tasks')
 
-    def to_dict(self):
-        """Serialize task object to dictionary"""
+    def to_dict(self, category_task_count=None):
+        """Serialize task object to dictionary
+
+        category_task_count is passed through to the embedded category.
+        """
         return {
             'id': self.id,
             'title': self.title,
             'description': self.description,
             'status': self.status,
             'priority': self.priority,
-            'due_date': self.due_date.isoformat() if self.due_date else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
-            'created_at': self.created_at.isoformat(),
-            'updated_at': self.updated_at.isoformat(),
+            'due_date': self.due_date,
+            'completed_at': self.completed_at,
+            'created_at': self.created_at,
+            'updated_at': self.updated_at,
             'user_id': self.user_id,
-            'category': self.category.to_dict() if self.category else None
+            'category': self.category.to_dict(task_count=category_task_count) if self.category else None
         }
 
     def __repr__(self):
@@ -1,12 +1,141 @@
-from flask import Blueprint, request, jsonify
+import hashlib
+import re
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from datetime import datetime
+from itertools import combinations
+from math import ceil
+from sqlalchemy import bindparam, func, insert, select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import joinedload
 from app.models import User, Task, Category
 from app.database import db
+from app.json_provider import dumps
 from app.auth import token_required, generate_token, validate_user_credentials, register_user
 
 api_bp = Blueprint('api', __name__)
 
+# Columns GET /tasks may sort by; anything else falls back to created_at
+_TASK_SORT_COLUMNS = {
+    'id': Task.id,
+    'title': Task.title,
+    'status': Task.status,
+    'priority': Task.priority,
+    'due_date': Task.due_date,
+    'completed_at': Task.completed_at,
+    'created_at': Task.created_at,
+    'updated_at': Task.updated_at
+}
+
+# Leading date part of every form datetime.fromisoformat accepts (calendar or week date)
+_ISO_DATE_PREFIX = re.compile(r'\d{4}-?(?:\d{2}|W\d{2})')
+
+# Filters GET /tasks accepts, in the order their conditions are applied
+_TASK_FILTERS = ('status', 'priority', 'category_id')
+
+
+# Columns GET /tasks selects, in Task.to_dict order; category_id is replaced by
+# the embedded category when rows are serialized
+_TASK_LIST_COLUMNS = (
+    Task.id,
+    Task.title,
+    Task.description,
+    Task.status,
+    Task.priority,
+    Task.due_date,
+    Task.completed_at,
+    Task.created_at,
+    Task.updated_at,
+    Task.user_id,
+    Task.category_id
+)
+
+
+def _build_task_query(active_filters):
+    """Build the task list query for a filter combination using named bind params"""
+    # Plain column rows skip ORM hydration; the list endpoint only serializes them
+    query = select(*_TASK_LIST_COLUMNS).where(Task.user_id == bindparam('user_id'))
+    for name in active_filters:
+        query = query.where(getattr(Task, name) == bindparam(name))
+    return query
+
+
+# One statement per filter combination, built once; values are bound at execute
+# time so SQLAlchemy's compiled cache sees a fixed set of statement shapes
+_TASK_QUERY_VARIANTS = {
+    active_filters: _build_task_query(active_filters)
+    for size in range(len(_TASK_FILTERS) + 1)
+    for active_filters in combinations(_TASK_FILTERS, size)
+}
+
+
+def _parse_iso_datetime(value):
+    """Parse an ISO 8601 date/datetime string, returning None if it's invalid"""
+    # Reject obviously malformed input without raising and catching ValueError
+    if not isinstance(value, str) or not _ISO_DATE_PREFIX.match(value):
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _etag(*parts):
+    """Build a short ETag from the values a representation is derived from"""
+    return hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=8).hexdigest()
+
+
+def _not_modified(etag):
+    """Return a 304 response if the client's If-None-Match matches etag"""
+    if not request.if_none_match.contains(etag):
+        return None
+
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _category_task_counts(category_ids=None):
+    """Return a {category_id: task_count} map using a single grouped query"""
+    query = db.session.query(Task.category_id, func.count(Task.id))
+    if category_ids is None:
+        query = query.filter(Task.category_id.isnot(None))
+    else:
+        query = query.filter(Task.category_id.in_(category_ids))
+    return dict(query.group_by(Task.category_id).all())
+
+
+def _paginate_rows(query, params, page, per_page):
+    """Paginate a column select, returning (row mappings, total, pages)
+
+    Follows db.paginate(error_out=False), which only handles ORM entities.
+    """
+    page = max(page, 1)
+    per_page = per_page if per_page > 0 else 20
+
+    total = db.session.execute(
+        select(func.count()).select_from(query.order_by(None).subquery()),
+        params
+    ).scalar()
+    rows = db.session.execute(
+        query.limit(per_page).offset((page - 1) * per_page),
+        params
+    ).mappings().all()
+
+    return rows, total, ceil(total / per_page) if total else 0
+
+
+def _stream_task_page(rows, categories, meta):
+    """Yield a page of task rows as a JSON object, encoding one task at a time"""
+    yield b'{"tasks":['
+    for index, row in enumerate(rows):
+        if index:
+            yield b','
+        task = dict(row)
+        task['category'] = categories.get(task.pop('category_id'))
+        yield dumps(task)
+    # Close the array and splice the pagination fields into the same object
+    yield b'],' + dumps(meta)[1:]
+
 
 # ==================== Authentication Routes ====================
 
@@ -78,7 +207,24 @@ def get_categories(current_user):
     """Get all categories"""
     try:
         categories = Category.query.all()
-        return jsonify([category.to_dict() for category in categories]), 200
+        counts = _category_task_counts()
+
+        # Category has no updated_at, so the ETag covers every serialized field
+        etag = _etag(*(
+            (category.id, category.name, category.description, category.color,
+             category.created_at, counts.get(category.id, 0))
+            for category in categories
+        ))
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+
+        response = jsonify([
+            category.to_dict(task_count=counts.get(category.id, 0))
+            for category in categories
+        ])
+        response.set_etag(etag)
+        return response, 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -94,21 +240,25 @@ def create_category(current_user):
             return jsonify({'error': 'Category name is required'}), 400
 
         # Check if category already exists
-        if Category.query.filter_by(name=data['name']).first():
+        if db.session.query(Category.query.filter_by(name=data['name']).exists()).scalar():
             return jsonify({'error': 'Category already exists'}), 400
 
-        category = Category(
-            name=data['name'],
-            description=data.get('description'),
-            color=data.get('color', '#3498db')
-        )
-
-        db.session.add(category)
+        # INSERT ... RETURNING loads the new row in the same round-trip
+        category = db.session.execute(
+            insert(Category).values(
+                name=data['name'],
+                description=data.get('description'),
+                color=data.get('color', '#3498db')
+            ).returning(Category)
+        ).scalar_one()
+
+        # Serialize before commit expires the returned attributes; a new category has no tasks
+        category_data = category.to_dict(task_count=0)
         db.session.commit()
 
         return jsonify({
             'message': 'Category created successfully',
-            'category': category.to_dict()
+            'category': category_data
         }), 201
 
     except SQLAlchemyError as e:
@@ -192,20 +342,23 @@ def delete_category(current_user, category_id):
 def get_tasks(current_user):
     """Get all tasks for current user with optional filters"""
     try:
-        query = Task.query.filter_by(user_id=current_user.id)
+        params = {'user_id': current_user.id}
 
         # Apply filters from query parameters
         status = request.args.get('status')
         if status:
-            query = query.filter_by(status=status)
+            params['status'] = status
 
         priority = request.args.get('priority')
         if priority:
-            query = query.filter_by(priority=priority)
+            params['priority'] = priority
 
         category_id = request.args.get('category_id')
         if category_id:
-            query = query.filter_by(category_id=int(category_id))
+            params['category_id'] = int(category_id)
+
+        active_filters = tuple(name for name in _TASK_FILTERS if name in params)
+        query = _TASK_QUERY_VARIANTS[active_filters]
 
         # Pagination
         page = request.args.get('page', 1, type=int)
@@ -215,20 +368,34 @@ def get_tasks(current_user):
         sort_by = request.args.get('sort_by', 'created_at')
         order = request.args.get('order', 'desc')
 
-        if hasattr(Task, sort_by):
-            column = getattr(Task, sort_by)
-            query = query.order_by(column.desc() if order == 'desc' else column.asc())
+        column = _TASK_SORT_COLUMNS.get(sort_by, Task.created_at)
+        query = query.order_by(column.desc() if order == 'desc' else column.asc())
 
         # Execute query with pagination
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-
-        return jsonify({
-            'tasks': [task.to_dict() for task in pagination.items],
-            'total': pagination.total,
+        rows, total, pages = _paginate_rows(query, params, page, per_page)
+
+        # Serialize each distinct category on the page once
+        category_ids = {row['category_id'] for row in rows if row['category_id'] is not None}
+        categories = {}
+        if category_ids:
+            counts = _category_task_counts(category_ids)
+            categories = {
+                category.id: category.to_dict(task_count=counts.get(category.id, 0))
+                for category in db.session.scalars(select(Category).where(Category.id.in_(category_ids)))
+            }
+
+        meta = {
+            'total': total,
             'page': page,
             'per_page': per_page,
-            'pages': pagination.pages
-        }), 200
+            'pages': pages
+        }
+
+        return Response(
+            stream_with_context(_stream_task_page(rows, categories, meta)),
+            status=200,
+            mimetype='application/json'
+        )
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -239,7 +406,7 @@ def get_tasks(current_user):
 def get_task(current_user, task_id):
     """Get a specific task"""
     try:
-        task = db.session.get(Task, task_id)
+        task = db.session.get(Task, task_id, options=[joinedload(Task.category)])
 
         if not task:
             return jsonify({'error': 'Task not found'}), 404
@@ -247,7 +414,23 @@ def get_task(current_user, task_id):
         if task.user_id != current_user.id:
             return jsonify({'error': 'Unauthorized access'}), 403
 
-        return jsonify(task.to_dict()), 200
+        # The ETag covers the embedded category too, including its task count
+        category = task.category
+        category_task_count = None
+        category_state = None
+        if category:
+            category_task_count = _category_task_counts([category.id]).get(category.id, 0)
+            category_state = (category.id, category.name, category.description, category.color,
+                              category.created_at, category_task_count)
+
+        etag = _etag(task.id, task.updated_at.timestamp(), category_state)
+        not_modified = _not_modified(etag)
+        if not_modified:
+            return not_modified
+
+        response = jsonify(task.to_dict(category_task_count=category_task_count))
+        response.set_etag(etag)
+        return response, 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -265,31 +448,36 @@ def create_task(current_user):
 
         # Validate category if provided
         category_id = data.get('category_id')
-        if category_id and not db.session.get(Category, category_id):
+        if category_id and not db.session.query(Category.query.filter_by(id=category_id).exists()).scalar():
             return jsonify({'error': 'Category not found'}), 404
 
-        task = Task(
-            title=data['title'],
-            description=data.get('description'),
-            status=data.get('status', 'pending'),
-            priority=data.get('priority', 'medium'),
-            category_id=category_id,
-            user_id=current_user.id
-        )
+        values = {
+            'title': data['title'],
+            'description': data.get('description'),
+            'status': data.get('status', 'pending'),
+            'priority': data.get('priority', 'medium'),
+            'category_id': category_id,
+            'user_id': current_user.id
+        }
 
         # Parse due_date if provided
         if 'due_date' in data:
-            try:
-                task.due_date = datetime.fromisoformat(data['due_date'])
-            except ValueError:
+            values['due_date'] = _parse_iso_datetime(data['due_date'])
+            if values['due_date'] is None:
                 return jsonify({'error': 'Invalid due_date format. Use ISO format'}), 400
 
-        db.session.add(task)
+        # INSERT ... RETURNING loads the new row in the same round-trip
+        task = db.session.execute(
+            insert(Task).values(**values).returning(Task)
+        ).scalar_one()
+
+        # Serialize before commit expires the returned attributes
+        task_data = task.to_dict()
         db.session.commit()
 
         return jsonify({
             'message': 'Task created successfully',
-            'task': task.to_dict()
+            'task': task_data
         }), 201
 
     except SQLAlchemyError as e:
@@ -331,10 +519,10 @@ def update_task(current_user, task_id):
         if 'category_id' in data:
             task.category_id = data['category_id']
         if 'due_date' in data:
-            try:
-                task.due_date = datetime.fromisoformat(data['due_date']) if data['due_date'] else None
-            except ValueError:
+            due_date = _parse_iso_datetime(data['due_date']) if data['due_date'] else None
+            if data['due_date'] and due_date is None:
                 return jsonify({'error': 'Invalid due_date format'}), 400
+            task.due_date = due_date
 
         db.session.commit()
 
@@ -382,10 +570,18 @@ def delete_task(current_user, task_id):
 def get_stats(current_user):
     """Get task statistics for current user"""
     try:
-        total_tasks = Task.query.filter_by(user_id=current_user.id).count()
-        pending_tasks = Task.query.filter_by(user_id=current_user.id, status='pending').count()
-        in_progress_tasks = Task.query.filter_by(user_id=current_user.id, status='in_progress').count()
-        completed_tasks = Task.query.filter_by(user_id=current_user.id, status='completed').count()
+        # One grouped scan instead of a COUNT per status
+        status_counts = dict(
+            db.session.query(Task.status, func.count(Task.id))
+            .filter(Task.user_id == current_user.id)
+            .group_by(Task.status)
+            .all()
+        )
+
+        total_tasks = sum(status_counts.values())
+        pending_tasks = status_counts.get('pending', 0)
+        in_progress_tasks = status_counts.get('in_progress', 0)
+        completed_tasks = status_counts.get('completed', 0)
 
         return jsonify({
             'total_tasks': total_tasks,